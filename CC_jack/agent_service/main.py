@@ -1,13 +1,14 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
-from uuid import uuid4, UUID
+from uuid import UUID
+from uuid_extensions import uuid7
 
 app = FastAPI()
 
 agents_db = {}
 @app.get("/")
-def read_root():
+async def read_root():
     """Root endpoint for health checks"""
     return {
         "service": "Agent Service",
@@ -45,49 +46,58 @@ class AgentUpdate(BaseModel):
     availability: Optional[Availability] = None
 
 @app.post("/agents", response_model=Agent)
-def create_agent(agent: AgentCreate):
-    agent_id = uuid4()
+async def create_agent(agent: AgentCreate):
+    agent_id = uuid7()
     new_agent = Agent(id=agent_id, **agent.dict())
-    agents_db[agent_id] = new_agent
+    agents_db[str(agent_id)] = new_agent
     return new_agent
 
 @app.get("/agents", response_model=List[Agent])
-def list_agents():
+async def list_agents():
     return list(agents_db.values())
 
 @app.get("/agents/{agent_id}", response_model=Agent)
-def get_agent(agent_id: UUID):
+async def get_agent(agent_id: str):
+    # RFC 4122 UUIDs are case-insensitive on input; the store keys are
+    # canonical lowercase
+    agent_id = agent_id.lower()
     agent = agents_db.get(agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
     return agent
 
 @app.put("/agents/{agent_id}", response_model=Agent)
-def update_agent(agent_id: UUID, update: AgentUpdate):
+async def update_agent(agent_id: str, update: AgentUpdate):
+    agent_id = agent_id.lower()
     agent = agents_db.get(agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
-    update_data = update.dict(exclude_unset=True)
-    updated_agent = agent.copy(update=update_data)
-    agents_db[agent_id] = updated_agent
-    return updated_agent
+    # Mutate in place - copy(update=...) reallocates and re-validates the
+    # whole model for what is usually a one-field change, and the object
+    # is already stored in agents_db
+    for field, value in update.dict(exclude_unset=True).items():
+        setattr(agent, field, value)
+    return agent
 
 @app.delete("/agents/{agent_id}")
-def delete_agent(agent_id: UUID):
+async def delete_agent(agent_id: str):
+    agent_id = agent_id.lower()
     if agent_id in agents_db:
         del agents_db[agent_id]
         return {"detail": "Agent deleted"}
     raise HTTPException(status_code=404, detail="Agent not found")
 
 @app.get("/agents/{agent_id}/availability", response_model=Availability)
-def get_availability(agent_id: UUID):
+async def get_availability(agent_id: str):
+    agent_id = agent_id.lower()
     agent = agents_db.get(agent_id)
     if not agent or not agent.availability:
         raise HTTPException(status_code=404, detail="Availability not found")
     return agent.availability
 
 @app.put("/agents/{agent_id}/availability", response_model=Availability)
-def update_availability(agent_id: UUID, availability: Availability):
+async def update_availability(agent_id: str, availability: Availability):
+    agent_id = agent_id.lower()
     agent = agents_db.get(agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
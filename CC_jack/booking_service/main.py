@@ -1,10 +1,23 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from uuid import uuid4, UUID
+from uuid import UUID
+from uuid_extensions import uuid7
+from contextlib import asynccontextmanager
 import os
 import httpx
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared HTTP client - reuses keep-alive connections instead of paying
+    # a TCP/TLS handshake on every downstream call
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        timeout=httpx.Timeout(connect=5, read=10, write=10, pool=10),
+    )
+    yield
+    await app.state.http.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Simulating agent service URL
 AGENT_SERVICE_URL = os.getenv("AGENT_SERVICE_URL", "http://agent_service:8000")
@@ -12,8 +25,13 @@ AGENT_SERVICE_URL = os.getenv("AGENT_SERVICE_URL", "http://agent_service:8000")
 # Mock database for bookings and commissions
 bookings_db = {}
 commissions_db = {}
+
+# Secondary indexes so per-agent lookups are O(1) instead of scanning
+# every booking/commission
+bookings_by_agent = {}
+commissions_by_agent = {}
 @app.get("/")
-def read_root():
+async def read_root():
     """Root endpoint for health checks"""
     return {
         "service": "Agent Service",
@@ -40,13 +58,14 @@ class Commission(BaseModel):
 @app.post("/bookings")
 async def create_booking(booking: Booking):
     # Validate agent exists via Agent Service
-    async with httpx.AsyncClient() as client:
-        agent_resp = await client.get(f"{AGENT_SERVICE_URL}/agents/{booking.agent_id}")
-        if agent_resp.status_code != 200:
-            raise HTTPException(status_code=404, detail="Agent not found")
+    agent_resp = await app.state.http.get(f"{AGENT_SERVICE_URL}/agents/{booking.agent_id}")
+    if agent_resp.status_code != 200:
+        raise HTTPException(status_code=404, detail="Agent not found")
 
-    booking_id = uuid4()
-    bookings_db[booking_id] = booking
+    booking_id = uuid7()
+    booking_key = str(booking_id)
+    bookings_db[booking_key] = booking
+    bookings_by_agent.setdefault(str(booking.agent_id), []).append(booking_key)
     commission_amount = booking.price * 0.1  # Example commission 10%
     commission = Commission(
         agent_id=booking.agent_id,
@@ -54,15 +73,18 @@ async def create_booking(booking: Booking):
         commission_percentage=10,
         commission_amount=commission_amount,
     )
-    commissions_db[booking_id] = commission
+    commissions_db[booking_key] = commission
+    commissions_by_agent.setdefault(str(booking.agent_id), []).append(booking_key)
     return {"booking_id": booking_id, "commission_amount": commission_amount}
 
 @app.get("/agents/{agent_id}/bookings")
-def get_agent_bookings(agent_id: UUID):
-    agent_bookings = [booking for booking in bookings_db.values() if booking.agent_id == agent_id]
-    return agent_bookings
+async def get_agent_bookings(agent_id: str):
+    # RFC 4122 UUIDs are case-insensitive on input; the store keys are
+    # canonical lowercase
+    agent_id = agent_id.lower()
+    return [bookings_db[booking_key] for booking_key in bookings_by_agent.get(agent_id, ())]
 
 @app.get("/agents/{agent_id}/commission")
-def get_agent_commission(agent_id: UUID):
-    agent_commissions = [commission for commission in commissions_db.values() if commission.agent_id == agent_id]
-    return agent_commissions
+async def get_agent_commission(agent_id: str):
+    agent_id = agent_id.lower()
+    return [commissions_db[booking_key] for booking_key in commissions_by_agent.get(agent_id, ())]
@@ -1,22 +1,67 @@
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Union
+from collections import deque, defaultdict
+from contextlib import asynccontextmanager
+from uuid import UUID
+import contextvars
+import itertools
 import httpx
+import orjson
 import asyncio
+import os
 import time
 import logging
 from datetime import datetime
 
+# Request id for correlating log lines; set per request by TimingMiddleware
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+def _new_request_id() -> str:
+    # Builds the UUID straight from 16 random bytes, skipping the slower
+    # generic uuid4() path - this runs on every request
+    return str(UUID(bytes=os.urandom(16), version=4))
+
+class RequestIdFilter(logging.Filter):
+    """Inject the current request id into every log record"""
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
 )
+for _handler in logging.getLogger().handlers:
+    _handler.addFilter(RequestIdFilter())
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Error Handling Service")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared HTTP client - reuses keep-alive connections across health checks
+    # and proxied requests instead of opening a fresh pool per call.
+    # http2=True lets the parallel health-check fan-out multiplex over one
+    # connection per backend; httpx falls back to HTTP/1.1 via ALPN.
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        timeout=httpx.Timeout(connect=5, read=10, write=10, pool=10),
+    )
+    health_task = asyncio.create_task(periodic_health_check())
+    log_task = asyncio.create_task(_error_log_worker())
+    yield
+    health_task.cancel()
+    log_task.cancel()
+    await app.state.http.aclose()
+
+# orjson is applied per-route on the plain-dict endpoints below; current
+# FastAPI deprecates ORJSONResponse as a default_response_class and
+# ignores it on endpoints with a response_model anyway
+app = FastAPI(title="Error Handling Service", lifespan=lifespan)
 
 # Service registry - will be populated dynamically
 service_registry = {
@@ -31,8 +76,32 @@ service_registry = {
 # Health status tracking
 health_status = {}
 
-# Error history
-error_history = []
+# Health results younger than this are served from cache instead of
+# re-probing the downstream service (polling dashboards would otherwise
+# multiply load on every backend)
+HEALTH_CACHE_TTL = 5.0
+_health_cache_ts: Dict[str, float] = {}
+
+# Probes already in flight, so concurrent /health hits share one outbound
+# request per service instead of each firing their own
+_inflight_health: Dict[str, asyncio.Future] = {}
+
+# Error history - bounded so an error storm can't grow memory forever
+error_history = deque(maxlen=10000)
+errors_by_service = defaultdict(lambda: deque(maxlen=1000))
+
+# Log lines are written by a background worker so request handlers never
+# block on stderr IO during an error storm; messages are dropped when the
+# queue is full rather than stalling requests
+_error_log_queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+
+async def _error_log_worker():
+    while True:
+        request_id, message = await _error_log_queue.get()
+        # Restore the originating request's id - the worker runs in its own
+        # task context, where RequestIdFilter would otherwise resolve to "-"
+        request_id_var.set(request_id)
+        logger.error(message)
 
 # Models
 class ServiceStatus(BaseModel):
@@ -57,22 +126,46 @@ class ProxyRequest(BaseModel):
     data: Optional[Dict] = None
     headers: Optional[Dict] = None
 
-# Middleware to log all requests
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
-    except Exception as e:
-        logger.error(f"Request failed: {str(e)}")
-        return JSONResponse(
-            status_code=500,
-            content={"detail": "Internal Server Error", "message": str(e)}
-        )
+# Timing/error middleware as a pure ASGI callable - avoids the extra
+# Request/Response objects and task group BaseHTTPMiddleware creates per call
+class TimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _new_request_id()
+        request_id_var.set(request_id)
+        start_time = time.perf_counter()
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                process_time = time.perf_counter() - start_time
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", str(process_time).encode()))
+                headers.append((b"x-request-id", request_id.encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            logger.error(f"Request failed: {str(e)}")
+            if response_started:
+                raise
+            response = JSONResponse(
+                status_code=500,
+                content={"detail": "Internal Server Error", "message": str(e)}
+            )
+            await response(scope, receive, send)
+
+app.add_middleware(TimingMiddleware)
 
 # Health check endpoints
 @app.get("/health", response_model=Dict[str, ServiceStatus])
@@ -82,54 +175,74 @@ async def get_all_services_health():
     return health_status
 
 @app.get("/health/{service_name}", response_model=ServiceStatus)
-async def get_service_health(service_name: str):
+async def get_service_health(service_name: str, refresh: bool = False):
     """Get health status of a specific service"""
     if service_name not in service_registry:
         return JSONResponse(
             status_code=404,
             content={"detail": f"Service '{service_name}' not found in registry"}
         )
-        
-    await check_service_health(service_name, service_registry[service_name])
+
+    await check_service_health(service_name, service_registry[service_name], force=refresh)
     return health_status.get(service_name)
 
-async def check_service_health(service_name: str, service_url: str):
+async def check_service_health(service_name: str, service_url: str, force: bool = False):
     """Check health of a specific service"""
+    # Serve the cached result while it is fresh - the background
+    # periodic_health_check keeps it refreshed
+    if not force and service_name in health_status:
+        if time.monotonic() - _health_cache_ts.get(service_name, 0) < HEALTH_CACHE_TTL:
+            return
+
+    # Coalesce concurrent callers: whoever gets here first performs the
+    # probe, everyone else awaits its result
+    inflight = _inflight_health.get(service_name)
+    if inflight is not None:
+        await inflight
+        return
+
+    fut = asyncio.get_event_loop().create_future()
+    _inflight_health[service_name] = fut
+
     health_endpoint = f"{service_url}/"
     start_time = time.time()
-    
+    _health_cache_ts[service_name] = time.monotonic()
+
     try:
-        async with httpx.AsyncClient(timeout=3.0) as client:
-            response = await client.get(health_endpoint)
-            
-        end_time = time.time()
-        response_time = (end_time - start_time) * 1000  # Convert to ms
-        
-        status = "up" if response.status_code < 300 else "degraded"
-        
-        health_status[service_name] = ServiceStatus(
-            service_name=service_name,
-            status=status,
-            last_checked=datetime.now().isoformat(),
-            response_time=response_time,
-            endpoint=health_endpoint
-        )
-    except Exception as e:
-        health_status[service_name] = ServiceStatus(
-            service_name=service_name,
-            status="down",
-            last_checked=datetime.now().isoformat(),
-            response_time=0,
-            endpoint=health_endpoint
-        )
-        
-        # Log the error
-        log_error(
-            service_name=service_name,
-            endpoint=health_endpoint,
-            status_code=503,
-            error_message=str(e)
-        )
+        try:
+            response = await app.state.http.get(health_endpoint, timeout=3.0)
+
+            end_time = time.time()
+            response_time = (end_time - start_time) * 1000  # Convert to ms
+
+            status = "up" if response.status_code < 300 else "degraded"
+
+            health_status[service_name] = ServiceStatus(
+                service_name=service_name,
+                status=status,
+                last_checked=datetime.now().isoformat(),
+                response_time=response_time,
+                endpoint=health_endpoint
+            )
+        except Exception as e:
+            health_status[service_name] = ServiceStatus(
+                service_name=service_name,
+                status="down",
+                last_checked=datetime.now().isoformat(),
+                response_time=0,
+                endpoint=health_endpoint
+            )
+
+            # Log the error
+            log_error(
+                service_name=service_name,
+                endpoint=health_endpoint,
+                status_code=503,
+                error_message=str(e)
+            )
+    finally:
+        _inflight_health.pop(service_name, None)
+        fut.set_result(None)
 
 async def check_all_services_health():
     """Check health of all registered services"""
@@ -143,7 +256,8 @@ async def check_all_services_health():
 @app.get("/errors", response_model=List[ErrorLog])
 async def get_error_history(limit: int = 50):
     """Get recent error history with limit"""
-    return error_history[-limit:] if len(error_history) > limit else error_history
+    start = max(0, len(error_history) - limit)
+    return list(itertools.islice(error_history, start, len(error_history)))
 
 @app.get("/errors/{service_name}", response_model=List[ErrorLog])
 async def get_service_errors(service_name: str):
@@ -154,8 +268,7 @@ async def get_service_errors(service_name: str):
             content={"detail": f"Service '{service_name}' not found in registry"}
         )
         
-    service_errors = [error for error in error_history if error.service_name == service_name]
-    return service_errors
+    return list(errors_by_service[service_name]) if service_name in errors_by_service else []
 
 def log_error(service_name: str, endpoint: str, status_code: int, error_message: str, request_details: Dict = None):
     """Log an error to the error history"""
@@ -168,11 +281,20 @@ def log_error(service_name: str, endpoint: str, status_code: int, error_message:
         request_details=request_details
     )
     error_history.append(error)
-    logger.error(f"Service Error: {service_name} - {endpoint} - {status_code} - {error_message}")
+    errors_by_service[service_name].append(error)
+    try:
+        # Capture the request id now - by the time the worker logs, the
+        # request's context is gone
+        _error_log_queue.put_nowait((
+            request_id_var.get(),
+            f"Service Error: {service_name} - {endpoint} - {status_code} - {error_message}"
+        ))
+    except asyncio.QueueFull:
+        pass  # shedding log lines beats stalling requests
     return error
 
 # Service proxy - allows making requests through this service for monitoring
-@app.post("/proxy")
+@app.post("/proxy", response_class=ORJSONResponse)
 async def proxy_request(request: ProxyRequest):
     """Proxy a request to another service with error handling"""
     if request.target_service not in service_registry:
@@ -193,40 +315,34 @@ async def proxy_request(request: ProxyRequest):
     }
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            if request.method.lower() == "get":
-                response = await client.get(
-                    full_url, 
-                    params=request.data,
-                    headers=request.headers
-                )
-            elif request.method.lower() == "post":
-                response = await client.post(
-                    full_url, 
-                    json=request.data,
-                    headers=request.headers
-                )
-            elif request.method.lower() == "put":
-                response = await client.put(
-                    full_url, 
-                    json=request.data,
-                    headers=request.headers
-                )
-            elif request.method.lower() == "delete":
-                response = await client.delete(
-                    full_url, 
-                    params=request.data,
-                    headers=request.headers
-                )
-            else:
-                return JSONResponse(
-                    status_code=400,
-                    content={"detail": f"Unsupported method: {request.method}"}
-                )
-                
-        # Return the response data and status code
+        client = app.state.http
+        method = request.method.lower()
+        if method not in ("get", "post", "put", "delete"):
+            return JSONResponse(
+                status_code=400,
+                content={"detail": f"Unsupported method: {request.method}"}
+            )
+
+        if method in ("get", "delete"):
+            req = client.build_request(
+                method.upper(), full_url,
+                params=request.data,
+                headers=request.headers
+            )
+        else:
+            req = client.build_request(
+                method.upper(), full_url,
+                json=request.data,
+                headers=request.headers
+            )
+
+        response = await client.send(req, stream=True)
+
+
         if response.status_code >= 400:
-            # Log error for non-success responses
+            # Materialize the body only on failures so it can be logged
+            await response.aread()
+            await response.aclose()
             log_error(
                 service_name=request.target_service,
                 endpoint=endpoint,
@@ -234,13 +350,28 @@ async def proxy_request(request: ProxyRequest):
                 error_message=str(response.text),
                 request_details=request_details
             )
-        
-        return {
-            "status_code": response.status_code,
-            "headers": dict(response.headers),
-            "data": response.json() if response.headers.get("content-type") == "application/json" else response.text,
-            "service": request.target_service
-        }
+            return {
+                "status_code": response.status_code,
+                "headers": dict(response.headers),
+                "data": orjson.loads(response.content) if (response.headers.get("content-type") or "").startswith("application/json") else response.text,
+                "service": request.target_service
+            }
+
+        # Pipe successful bodies straight through without buffering them
+        # in memory; the headers still describe the raw bytes. Drop the
+        # headers the server sets itself - forwarding the upstream's date
+        # and server would duplicate them on the wire
+        response_headers = dict(response.headers)
+        response_headers.pop("transfer-encoding", None)
+        response_headers.pop("connection", None)
+        response_headers.pop("date", None)
+        response_headers.pop("server", None)
+        return StreamingResponse(
+            response.aiter_raw(),
+            status_code=response.status_code,
+            headers=response_headers,
+            background=BackgroundTask(response.aclose)
+        )
     except httpx.RequestError as e:
         error_message = f"Request to {request.target_service} failed: {str(e)}"
         
@@ -305,11 +436,6 @@ async def deregister_service(service_name: str):
         content={"detail": f"Service '{service_name}' not found in registry"}
     )
 
-# Background task to check service health periodically
-@app.on_event("startup")
-async def startup_event():
-    asyncio.create_task(periodic_health_check())
-
 async def periodic_health_check():
     """Periodically check the health of all services"""
     while True:
@@ -1,14 +1,19 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from uuid import uuid4, UUID
+from uuid import UUID
+from uuid_extensions import uuid7
 
 app = FastAPI()
 
 # Mock database for invoices and payouts
 invoices_db = {}
 payouts_db = {}
+
+# Secondary index so per-agent payout lookups are O(1) instead of
+# scanning every payout
+payouts_by_agent = {}
 @app.get("/")
-def read_root():
+async def read_root():
     """Root endpoint for health checks"""
     return {
         "service": "Agent Service",
@@ -30,18 +35,22 @@ class Payout(BaseModel):
     payout_amount: float
 
 @app.post("/invoice")
-def generate_invoice(invoice: Invoice):
-    invoice_id = uuid4()
-    invoices_db[invoice_id] = invoice
+async def generate_invoice(invoice: Invoice):
+    invoice_id = uuid7()
+    invoices_db[str(invoice_id)] = invoice
     return {"invoice_id": invoice_id, "amount": invoice.amount}
 
 @app.get("/agents/{agent_id}/payouts")
-def get_agent_payouts(agent_id: UUID):
-    agent_payouts = [payout for payout in payouts_db.values() if payout.agent_id == agent_id]
-    return agent_payouts
+async def get_agent_payouts(agent_id: str):
+    # RFC 4122 UUIDs are case-insensitive on input; the store keys are
+    # canonical lowercase
+    agent_id = agent_id.lower()
+    return [payouts_db[payout_key] for payout_key in payouts_by_agent.get(agent_id, ())]
 
 @app.post("/payout")
-def trigger_payout(payout: Payout):
-    payout_id = uuid4()
-    payouts_db[payout_id] = payout
+async def trigger_payout(payout: Payout):
+    payout_id = uuid7()
+    payout_key = str(payout_id)
+    payouts_db[payout_key] = payout
+    payouts_by_agent.setdefault(str(payout.agent_id), []).append(payout_key)
     return {"payout_id": payout_id, "amount": payout.payout_amount}
@@ -6,8 +6,12 @@ app = FastAPI()
 
 # In-memory sales store
 sales_data: Dict[str, float] = {}
+
+# Running total maintained on write so summary reads are O(1) instead of
+# summing over every agent
+_total_sales: float = 0.0
 @app.get("/")
-def read_root():
+async def read_root():
     """Root endpoint for health checks"""
     return {
         "service": "Agent Service",
@@ -24,17 +28,20 @@ class BookingData(BaseModel):
     price: float
 
 @app.post("/sales/record")
-def record_sale(booking: BookingData):
-    if booking.agent_id in sales_data:
-        sales_data[booking.agent_id] += booking.price
-    else:
-        sales_data[booking.agent_id] = booking.price
+async def record_sale(booking: BookingData):
+    global _total_sales
+    sales_data[booking.agent_id] = sales_data.get(booking.agent_id, 0.0) + booking.price
+    _total_sales += booking.price
     return {"message": "Sale recorded"}
 
 @app.get("/sales/by-agent/{agent_id}")
-def get_sales_by_agent(agent_id: str):
+async def get_sales_by_agent(agent_id: str):
     return [{"agent_id": agent_id, "sales": sales_data.get(agent_id, 0.0)}]
 
+@app.get("/sales/summary")
+async def get_sales_summary():
+    return {"total_sales": _total_sales, "agent_count": len(sales_data)}
+
 @app.get("/sales/trends")
-def get_sales_trends():
+async def get_sales_trends():
     return {"trend": "positive", "growth_percentage": 10}
\ No newline at end of file
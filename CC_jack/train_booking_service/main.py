@@ -1,12 +1,30 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
-from uuid import uuid4, UUID
+from uuid import UUID
+from uuid_extensions import uuid7
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import httpx
 from datetime import datetime
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared HTTP client - reuses keep-alive connections instead of paying
+    # a TCP/TLS handshake on every downstream call
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        timeout=httpx.Timeout(connect=5, read=10, write=10, pool=10),
+    )
+    yield
+    await app.state.http.aclose()
+
+# orjson is applied per-route on the dump-dict list endpoints; current
+# FastAPI deprecates ORJSONResponse as a default_response_class and
+# ignores it on endpoints with a response_model anyway
+app = FastAPI(lifespan=lifespan)
 
 # Environment variables for service URLs
 AGENT_SERVICE_URL = os.getenv("AGENT_SERVICE_URL", "http://agent_service:8000")
@@ -14,8 +32,16 @@ BOOKING_SERVICE_URL = os.getenv("BOOKING_SERVICE_URL", "http://booking_service:8
 
 # In-memory database for train bookings
 train_bookings_db = {}
+
+# Secondary index so per-agent lookups are O(1) instead of scanning
+# every booking
+train_bookings_by_agent = {}
+
+# Dict dumps of each booking, built once at write time so list endpoints
+# don't re-serialize every record through Pydantic on each read
+train_bookings_dump_db = {}
 @app.get("/")
-def read_root():
+async def read_root():
     """Root endpoint for health checks"""
     return {
         "service": "Agent Service",
@@ -126,53 +152,76 @@ class TrainInfo(BaseModel):
     available_classes: List[str]
     base_price: Dict[str, float]
 
+# trains_db is static, so build the TrainInfo responses once at import
+# instead of re-validating the same records on every request
+_TRAIN_INFO_CACHE = [TrainInfo(**train) for train in trains_db.values()]
+_TRAIN_INFO_BY_NUM = {info.train_number: info for info in _TRAIN_INFO_CACHE}
+
 @app.get("/trains", response_model=List[TrainInfo])
-def list_trains():
+async def list_trains():
     """List all available trains"""
-    return [TrainInfo(**train) for train in trains_db.values()]
+    return _TRAIN_INFO_CACHE
 
 @app.get("/trains/{train_number}", response_model=TrainInfo)
-def get_train(train_number: str):
+async def get_train(train_number: str):
     """Get details of a specific train"""
-    if train_number not in trains_db:
+    train = _TRAIN_INFO_BY_NUM.get(train_number)
+    if train is None:
         raise HTTPException(status_code=404, detail="Train not found")
-    return TrainInfo(**trains_db[train_number])
+    return train
+
+async def _record_booking(booking_payload: dict):
+    """Record a booking with the main booking service (for commission processing)"""
+    try:
+        await app.state.http.post(f"{BOOKING_SERVICE_URL}/bookings", json=booking_payload)
+    except Exception as e:
+        # Log the error but don't fail the booking - we can reconcile later
+        print(f"Error recording booking with booking service: {e}")
 
 @app.post("/train-bookings", response_model=TrainBooking)
-async def create_train_booking(booking: TrainBookingCreate):
+async def create_train_booking(booking: TrainBookingCreate, background_tasks: BackgroundTasks):
     """Create a new train booking"""
+    # Kick off the agent lookup so it overlaps the local validations below
+    agent_task = asyncio.create_task(
+        app.state.http.get(f"{AGENT_SERVICE_URL}/agents/{booking.agent_id}")
+    )
+
+    try:
+        # Validate train exists
+        if booking.train_number not in trains_db:
+            raise HTTPException(status_code=404, detail="Train not found")
+
+        train = trains_db[booking.train_number]
+
+        # Validate train class
+        if booking.train_class not in train["available_classes"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid train class. Available classes: {train['available_classes']}"
+            )
+
+        # Validate passenger count
+        if booking.passenger_count != len(booking.passengers):
+            raise HTTPException(
+                status_code=400,
+                detail="Passenger count does not match number of passenger details provided"
+            )
+    except HTTPException:
+        # Don't leak the in-flight agent request on early rejection
+        agent_task.cancel()
+        raise
+
     # Validate agent exists via Agent Service
-    async with httpx.AsyncClient() as client:
-        agent_resp = await client.get(f"{AGENT_SERVICE_URL}/agents/{booking.agent_id}")
-        if agent_resp.status_code != 200:
-            raise HTTPException(status_code=404, detail="Agent not found")
-    
-    # Validate train exists
-    if booking.train_number not in trains_db:
-        raise HTTPException(status_code=404, detail="Train not found")
-    
-    train = trains_db[booking.train_number]
-    
-    # Validate train class
-    if booking.train_class not in train["available_classes"]:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Invalid train class. Available classes: {train['available_classes']}"
-        )
-    
-    # Validate passenger count
-    if booking.passenger_count != len(booking.passengers):
-        raise HTTPException(
-            status_code=400,
-            detail="Passenger count does not match number of passenger details provided"
-        )
-    
+    agent_resp = await agent_task
+    if agent_resp.status_code != 200:
+        raise HTTPException(status_code=404, detail="Agent not found")
+
     # Calculate pricing
     price_per_passenger = train["base_price"][booking.train_class]
     total_price = price_per_passenger * booking.passenger_count
     
     # Create booking
-    booking_id = uuid4()
+    booking_id = uuid7()
     
     # Create train booking record
     new_booking = TrainBooking(
@@ -195,48 +244,82 @@ async def create_train_booking(booking: TrainBookingCreate):
         status="Confirmed"
     )
     
-    train_bookings_db[booking_id] = new_booking
-    
-    # Record this booking in the main booking service (for commission processing)
-    try:
-        async with httpx.AsyncClient() as client:
-            booking_payload = {
-                "agent_id": str(booking.agent_id),
-                "customer_name": booking.passengers[0].name,
-                "service_type": f"Train - {booking.train_class}",
-                "price": total_price
-            }
-            await client.post(f"{BOOKING_SERVICE_URL}/bookings", json=booking_payload)
-    except Exception as e:
-        # Log the error but don't fail the booking - we can reconcile later
-        print(f"Error recording booking with booking service: {e}")
-    
+    booking_key = str(booking_id)
+    train_bookings_db[booking_key] = new_booking
+    train_bookings_by_agent.setdefault(str(booking.agent_id), []).append(booking_key)
+    train_bookings_dump_db[booking_key] = new_booking.dict()
+
+    # Record this booking in the main booking service after responding -
+    # its result is not needed here, so keep the round-trip off the
+    # request path
+    booking_payload = {
+        "agent_id": str(booking.agent_id),
+        "customer_name": booking.passengers[0].name,
+        "service_type": f"Train - {booking.train_class}",
+        "price": total_price
+    }
+    background_tasks.add_task(_record_booking, booking_payload)
+
     return new_booking
 
-@app.get("/train-bookings", response_model=List[TrainBooking])
-def list_train_bookings():
+@app.get("/train-bookings", response_class=ORJSONResponse)
+async def list_train_bookings():
     """List all train bookings"""
-    return list(train_bookings_db.values())
+    return list(train_bookings_dump_db.values())
+
+# Registered before /train-bookings/{booking_id}: routes match in
+# declaration order, so the literal path must come first or
+# "search" is captured as a booking id
+@app.get("/train-bookings/search", response_class=ORJSONResponse)
+async def search_train_bookings(
+    agent_id: Optional[str] = None,
+    train_number: Optional[str] = None,
+    travel_date: Optional[str] = None,
+    status: Optional[str] = None
+):
+    """Search train bookings by various criteria"""
+    if agent_id:
+        agent_id = agent_id.lower()
+        # Start from the agent index so we only touch that agent's bookings
+        candidates = (
+            train_bookings_dump_db[booking_id]
+            for booking_id in train_bookings_by_agent.get(agent_id, ())
+        )
+    else:
+        candidates = train_bookings_dump_db.values()
+
+    # Apply all criteria in one pass instead of rebuilding the result list
+    # per filter
+    return [
+        booking for booking in candidates
+        if (train_number is None or booking["train_number"] == train_number)
+        and (travel_date is None or booking["travel_date"] == travel_date)
+        and (status is None or booking["status"] == status)
+    ]
 
 @app.get("/train-bookings/{booking_id}", response_model=TrainBooking)
-def get_train_booking(booking_id: UUID):
+async def get_train_booking(booking_id: str):
     """Get details of a specific train booking"""
+    # RFC 4122 UUIDs are case-insensitive on input; the store keys are
+    # canonical lowercase
+    booking_id = booking_id.lower()
     if booking_id not in train_bookings_db:
         raise HTTPException(status_code=404, detail="Train booking not found")
     return train_bookings_db[booking_id]
 
-@app.get("/agents/{agent_id}/train-bookings", response_model=List[TrainBooking])
-def get_agent_train_bookings(agent_id: UUID):
+@app.get("/agents/{agent_id}/train-bookings", response_class=ORJSONResponse)
+async def get_agent_train_bookings(agent_id: str):
     """Get all train bookings for a specific agent"""
-    agent_bookings = [
-        booking for booking in train_bookings_db.values() 
-        if booking.agent_id == agent_id
+    agent_id = agent_id.lower()
+    return [
+        train_bookings_dump_db[booking_id]
+        for booking_id in train_bookings_by_agent.get(agent_id, ())
     ]
-    return agent_bookings
 
 @app.put("/train-bookings/{booking_id}/cancel")
-def cancel_train_booking(booking_id: UUID):
+async def cancel_train_booking(booking_id: str):
     """Cancel a train booking"""
+    booking_id = booking_id.lower()
     if booking_id not in train_bookings_db:
         raise HTTPException(status_code=404, detail="Train booking not found")
     
@@ -244,32 +327,9 @@ def cancel_train_booking(booking_id: UUID):
     if booking.status == "Cancelled":
         raise HTTPException(status_code=400, detail="Booking is already cancelled")
     
-    # Update booking status
+    # Update booking status (and keep the cached dump in sync)
     booking.status = "Cancelled"
     train_bookings_db[booking_id] = booking
-    
-    return {"message": "Booking cancelled successfully"}
+    train_bookings_dump_db[booking_id]["status"] = "Cancelled"
 
-@app.get("/train-bookings/search")
-def search_train_bookings(
-    agent_id: Optional[UUID] = None,
-    train_number: Optional[str] = None,
-    travel_date: Optional[str] = None,
-    status: Optional[str] = None
-):
-    """Search train bookings by various criteria"""
-    results = list(train_bookings_db.values())
-    
-    if agent_id:
-        results = [booking for booking in results if booking.agent_id == agent_id]
-    
-    if train_number:
-        results = [booking for booking in results if booking.train_number == train_number]
-    
-    if travel_date:
-        results = [booking for booking in results if booking.travel_date == travel_date]
-    
-    if status:
-        results = [booking for booking in results if booking.status == status]
-    
-    return results
\ No newline at end of file
+    return {"message": "Booking cancelled successfully"}
@@ -1,18 +1,120 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from uuid import UUID
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+import asyncio
+import logging
 import os
+import queue
+import time
 import httpx
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
 # Environment variables for service URLs
 TRAIN_BOOKING_SERVICE_URL = os.getenv("TRAIN_BOOKING_SERVICE_URL", "http://train_booking_service:8084")
 
-# Simple in-memory database for seat reservations
-# Structure: {booking_id: {"train_number": str, "seats": List[str], "travel_date": str, "status": str}}
-seat_reservations_db = {}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Route log records through a queue drained on a background thread, so
+    # a slow stdout pipe (containerized logging) never blocks the event loop
+    log_queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(QueueHandler(log_queue))
+
+    # Shared HTTP client - keeps keep-alive connections to the train
+    # booking service warm instead of paying a TCP/TLS handshake per call.
+    # http2=True lets concurrent lookups multiplex over one connection;
+    # httpx falls back to HTTP/1.1 automatically via ALPN.
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        base_url=TRAIN_BOOKING_SERVICE_URL,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=httpx.Timeout(10.0),
+    )
+    yield
+    await app.state.http.aclose()
+    listener.stop()
+
+# orjson is applied per-route on the plain-dict endpoints; current
+# FastAPI deprecates ORJSONResponse as a default_response_class and
+# ignores it on endpoints with a response_model anyway
+app = FastAPI(lifespan=lifespan)
+
+# Simple in-memory database for seat reservations, keyed by the booking
+# UUID itself - hashing a UUID is cheaper than formatting it to a string
+# on every request
+# Structure: {booking_id: SeatStatus}
+seat_reservations_db: Dict[UUID, "SeatStatus"] = {}
+
+# TTL cache over booking-service lookups so repeated status probes for
+# the same booking don't each hit the upstream. 404s are cached briefly
+# too, so probes for non-existent bookings stop hammering the service.
+BOOKING_CACHE_TTL = 30.0
+BOOKING_NEGATIVE_CACHE_TTL = 5.0
+BOOKING_CACHE_MAX = 1024
+_booking_cache: "OrderedDict[UUID, tuple]" = OrderedDict()
+_booking_cache_lock = asyncio.Lock()
+
+# Lookups already in flight, keyed by booking id - concurrent callers for
+# the same booking share one upstream request instead of each firing their own
+_inflight_lookups: Dict[UUID, asyncio.Future] = {}
+
+async def _get_booking_status_cached(booking_id: UUID) -> int:
+    """Status code of GET /train-bookings/{id} on the booking service, cached with a TTL"""
+    now = time.monotonic()
+    async with _booking_cache_lock:
+        cached = _booking_cache.get(booking_id)
+        if cached and now < cached[0]:
+            _booking_cache.move_to_end(booking_id)
+            return cached[1]
+
+        inflight = _inflight_lookups.get(booking_id)
+        if inflight is None:
+            inflight = asyncio.get_event_loop().create_future()
+            # Mark any failure as consumed - with no concurrent waiters,
+            # asyncio would otherwise log "Future exception was never
+            # retrieved" for every solo cache miss while upstream is down
+            inflight.add_done_callback(lambda f: f.exception())
+            _inflight_lookups[booking_id] = inflight
+            is_owner = True
+        else:
+            is_owner = False
+
+    if not is_owner:
+        # Someone else is already asking upstream - share their answer
+        return await inflight
+
+    try:
+        response = await app.state.http.get(f"/train-bookings/{booking_id}")
+        status_code = response.status_code
+    except BaseException as exc:
+        _inflight_lookups.pop(booking_id, None)
+        inflight.set_exception(exc)
+        raise
+
+    ttl = BOOKING_CACHE_TTL if status_code == 200 else BOOKING_NEGATIVE_CACHE_TTL
+    async with _booking_cache_lock:
+        _booking_cache[booking_id] = (time.monotonic() + ttl, status_code)
+        _booking_cache.move_to_end(booking_id)
+        # Evict oldest entries when over the cap
+        while len(_booking_cache) > BOOKING_CACHE_MAX:
+            _booking_cache.popitem(last=False)
+
+    _inflight_lookups.pop(booking_id, None)
+    inflight.set_result(status_code)
+    return status_code
 @app.get("/")
 def read_root():
     """Root endpoint for health checks"""
@@ -33,60 +135,95 @@ class SeatStatus(BaseModel):
     travel_date: str
     status: str  # "confirmed" or "cancelled"
 
-@app.get("/bookings/{booking_id}/seats/status")
+@app.get("/bookings/{booking_id}/seats/status", response_class=ORJSONResponse)
 async def check_seat_status(booking_id: UUID):
     """Check if seats for a booking are confirmed"""
-    booking_id_str = str(booking_id)
-    
-    if booking_id_str not in seat_reservations_db:
+    if booking_id not in seat_reservations_db:
         # Try to get from train booking service
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{TRAIN_BOOKING_SERVICE_URL}/train-bookings/{booking_id}"
-                )
-                if response.status_code != 200:
-                    raise HTTPException(status_code=404, detail="Booking not found")
-                
-                # Booking exists but no seat reservation yet
-                return {
-                    "booking_id": booking_id,
-                    "status": "unconfirmed",
-                    "message": "No seat reservation found for this booking"
-                }
+            status_code = await _get_booking_status_cached(booking_id)
+            if status_code != 200:
+                raise HTTPException(status_code=404, detail="Booking not found")
+
+            # Booking exists but no seat reservation yet
+            return {
+                "booking_id": booking_id,
+                "status": "unconfirmed",
+                "message": "No seat reservation found for this booking"
+            }
         except httpx.RequestError:
             raise HTTPException(status_code=503, detail="Train booking service unavailable")
     
-    reservation = seat_reservations_db[booking_id_str]
-    
+    reservation = seat_reservations_db[booking_id]
+
     return {
         "booking_id": booking_id,
-        "train_number": reservation["train_number"],
-        "travel_date": reservation["travel_date"],
-        "seats": reservation["seats"],
-        "status": reservation["status"]
+        "train_number": reservation.train_number,
+        "travel_date": reservation.travel_date,
+        "seats": reservation.seats,
+        "status": reservation.status
     }
 
-@app.put("/bookings/{booking_id}/seats/cancel")
+@app.post("/bookings/seats/status", response_class=ORJSONResponse)
+async def bulk_seat_status(ids: List[UUID]):
+    """Check seat status for a batch of bookings in a single call"""
+    results = {}
+    need_fetch = []
+
+    for booking_id in ids:
+        reservation = seat_reservations_db.get(booking_id)
+        if reservation is not None:
+            results[str(booking_id)] = {
+                "booking_id": booking_id,
+                "train_number": reservation.train_number,
+                "travel_date": reservation.travel_date,
+                "seats": reservation.seats,
+                "status": reservation.status
+            }
+        else:
+            need_fetch.append(booking_id)
+
+    if need_fetch:
+        # Resolve all misses concurrently; the cache and in-flight
+        # coalescing keep the upstream load at one request per booking
+        statuses = await asyncio.gather(
+            *[_get_booking_status_cached(booking_id) for booking_id in need_fetch],
+            return_exceptions=True
+        )
+        for booking_id, status_code in zip(need_fetch, statuses):
+            if isinstance(status_code, Exception):
+                results[str(booking_id)] = {
+                    "status": "unknown",
+                    "message": "Train booking service unavailable"
+                }
+            elif status_code != 200:
+                results[str(booking_id)] = {
+                    "status": "not_found",
+                    "message": "Booking not found"
+                }
+            else:
+                results[str(booking_id)] = {
+                    "status": "unconfirmed",
+                    "message": "No seat reservation found for this booking"
+                }
+
+    return results
+
+@app.put("/bookings/{booking_id}/seats/cancel", response_class=ORJSONResponse)
 async def cancel_seat_reservation(booking_id: UUID):
     """Cancel seat reservations for a booking"""
-    booking_id_str = str(booking_id)
-    
-    if booking_id_str not in seat_reservations_db:
+    if booking_id not in seat_reservations_db:
         raise HTTPException(status_code=404, detail="No seat reservations found for this booking")
     
     # Update the status to cancelled
-    seat_reservations_db[booking_id_str]["status"] = "cancelled"
+    seat_reservations_db[booking_id].status = "cancelled"
     
     # Notify the train booking service about the cancellation (in a real system)
     try:
-        async with httpx.AsyncClient() as client:
-            await client.put(
-                f"{TRAIN_BOOKING_SERVICE_URL}/train-bookings/{booking_id}/cancel"
-            )
+        await app.state.http.put(f"/train-bookings/{booking_id}/cancel")
     except httpx.RequestError:
         # Log the error but don't fail - we can reconcile later
-        print(f"Error notifying booking service about cancellation: {booking_id}")
+        logger.warning("Error notifying booking service about cancellation for %s", booking_id)
     
     return {
         "message": "Seat reservations cancelled successfully",
@@ -98,13 +235,8 @@ async def cancel_seat_reservation(booking_id: UUID):
 @app.post("/seat-reservations", response_model=SeatStatus)
 async def create_seat_reservation(reservation: SeatStatus):
     """Create a seat reservation record - this would be called internally by the booking service"""
-    booking_id_str = str(reservation.booking_id)
-    
-    seat_reservations_db[booking_id_str] = {
-        "train_number": reservation.train_number,
-        "seats": reservation.seats,
-        "travel_date": reservation.travel_date,
-        "status": reservation.status
-    }
-    
+    # The request body is already a validated SeatStatus - store it as-is
+    # instead of unpacking it into a dict and rebuilding it on every read
+    seat_reservations_db[reservation.booking_id] = reservation
+
     return reservation
\ No newline at end of file